@@ -0,0 +1,91 @@
+
+import os
+from contextlib import nullcontext
+
+import torch
+
+from config import get_settings
+from logger import get_logger
+
+settings = get_settings()
+logger = get_logger("acceleration")
+
+PRECISION_MODES = ("fp32", "int8", "bf16", "channels_last")
+
+
+def bf16_supported() -> bool:
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def resolve_precision(device: torch.device, precision: str = None) -> str:
+    """
+    Return the precision mode that will actually be used on `device`.
+    Modes other than fp32 only apply on CPU; bf16 falls back to fp32 when the
+    CPU lacks native bf16 support.
+    """
+    precision = precision or settings.INFERENCE_PRECISION
+    if precision not in PRECISION_MODES:
+        raise ValueError(f"Unknown INFERENCE_PRECISION: {precision}")
+    if precision != "fp32" and settings.INFERENCE_BACKEND == "onnx":
+        logger.warning(f"INFERENCE_PRECISION={precision} only applies to the torch backend; using fp32")
+        return "fp32"
+    if precision != "fp32" and device.type != "cpu":
+        logger.warning(f"INFERENCE_PRECISION={precision} only applies on CPU; using fp32 on {device}")
+        return "fp32"
+    if precision == "bf16" and not bf16_supported():
+        logger.warning("CPU does not support bf16; using fp32")
+        return "fp32"
+    return precision
+
+
+def _cache_path(name: str, precision: str) -> str:
+    import doctr
+    filename = f"{name}_{precision}_torch{torch.__version__}_doctr{doctr.__version__}.pt"
+    return os.path.join(settings.ACCELERATION_CACHE_DIR, filename.replace("+", "_"))
+
+
+def load_accelerated(name: str, build_predictor, device: torch.device, precision: str):
+    """
+    Build a doctr predictor and apply the load-time transformations for
+    `precision` to its underlying model.
+
+    `build_predictor(pretrained)` must return the predictor. Quantized models
+    are cached under ACCELERATION_CACHE_DIR; on a cache hit the predictor is
+    built without pretrained weights and the cached model swapped in.
+    """
+    if precision == "int8":
+        cache_path = _cache_path(name, precision)
+        if os.path.exists(cache_path):
+            predictor = build_predictor(False).eval()
+            predictor.model = torch.load(cache_path, map_location="cpu", weights_only=False).eval()
+            logger.info(f"Loaded cached int8 {name} from {cache_path}")
+        else:
+            predictor = build_predictor(True).eval()
+            # Dynamic quantization covers Linear/LSTM layers (recognition heads);
+            # convolutions stay fp32
+            predictor.model = torch.ao.quantization.quantize_dynamic(
+                predictor.model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8
+            )
+            os.makedirs(settings.ACCELERATION_CACHE_DIR, exist_ok=True)
+            torch.save(predictor.model, cache_path)
+            logger.info(f"Cached int8 {name} at {cache_path}")
+    else:
+        predictor = build_predictor(True).to(device).eval()
+        if precision == "channels_last":
+            predictor.model = predictor.model.to(memory_format=torch.channels_last)
+
+    if settings.TORCH_COMPILE and device.type == "cpu":
+        # Recognition batches vary in size, so avoid recompiling per shape
+        predictor.model = torch.compile(predictor.model, dynamic=True)
+
+    return predictor
+
+
+def inference_context(precision: str):
+    """Autocast context for bf16; a no-op for every other mode."""
+    if precision == "bf16":
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+    return nullcontext()
@@ -0,0 +1,212 @@
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+
+from config import get_settings
+from logger import get_logger
+from metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, ADMISSION_REJECTED, ADMISSION_SLOT_WAITING
+
+settings = get_settings()
+logger = get_logger("admission")
+
+
+@dataclass
+class EndpointLimits:
+    priority: int       # lower runs first when competing for a model slot
+    max_in_flight: int  # admitted requests of this class
+    max_queue: int      # requests waiting for admission before 429
+
+
+class AdmissionRejected(HTTPException):
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(status_code=status_code, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+class AdmissionController:
+    """
+    Two-level admission control, driven from the event loop:
+
+    - `admit(cls)` bounds admitted and queued requests per endpoint class.
+      A full queue is rejected immediately with 429; a request that waits
+      longer than `queue_timeout` is rejected with 503.
+    - `slot(cls)` hands out the shared model execution slots in priority
+      order, so interactive detect requests overtake queued batch work.
+      Batch requests take a slot per image rather than per request.
+
+    Waiters are futures bound to the event loop that created them, so the
+    controller assumes a single event loop (one per worker process) and must
+    only be used from that loop; model calls go to the thread pool.
+    """
+
+    def __init__(self, limits: dict, max_concurrent: int, queue_timeout: float):
+        self.limits = limits
+        self.queue_timeout = queue_timeout
+        self.in_flight = {name: 0 for name in limits}
+        self.queues = {name: deque() for name in limits}
+        self.slots_free = max_concurrent
+        self.slot_waiters = []  # heap of (priority, seq, future)
+        self.slot_waiting = {name: 0 for name in limits}
+        self.service_time = {name: 1.0 for name in limits}  # EWMA seconds per request
+        self._seq = itertools.count()
+
+    # -- request admission -------------------------------------------------
+
+    @asynccontextmanager
+    async def admit(self, endpoint_class: str):
+        limits = self.limits[endpoint_class]
+        queue = self.queues[endpoint_class]
+
+        if self.in_flight[endpoint_class] < limits.max_in_flight and not queue:
+            self.in_flight[endpoint_class] += 1
+        else:
+            if len(queue) >= limits.max_queue:
+                self._reject(endpoint_class, 429, "queue_full")
+            future = asyncio.get_running_loop().create_future()
+            queue.append(future)
+            self._publish(endpoint_class)
+            try:
+                # The releaser increments in_flight on our behalf before waking us
+                await asyncio.wait_for(future, timeout=self.queue_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if future.done() and not future.cancelled():
+                    # Granted while being cancelled; hand the place on
+                    self._release(endpoint_class)
+                else:
+                    try:
+                        queue.remove(future)
+                    except ValueError:
+                        pass
+                self._publish(endpoint_class)
+                if isinstance(e, asyncio.TimeoutError):
+                    self._reject(endpoint_class, 503, "queue_timeout")
+                raise
+
+        self._publish(endpoint_class)
+        t0 = time.time()
+        try:
+            yield
+        finally:
+            duration = time.time() - t0
+            self.service_time[endpoint_class] = 0.8 * self.service_time[endpoint_class] + 0.2 * duration
+            self._release(endpoint_class)
+
+    def _release(self, endpoint_class: str):
+        self.in_flight[endpoint_class] -= 1
+        queue = self.queues[endpoint_class]
+        limits = self.limits[endpoint_class]
+        while queue and self.in_flight[endpoint_class] < limits.max_in_flight:
+            future = queue.popleft()
+            if future.done():
+                continue
+            self.in_flight[endpoint_class] += 1
+            future.set_result(True)
+        self._publish(endpoint_class)
+
+    def retry_after(self, endpoint_class: str) -> int:
+        """Estimate seconds until a queued request of this class would be admitted."""
+        limits = self.limits[endpoint_class]
+        backlog = len(self.queues[endpoint_class]) + 1
+        estimate = self.service_time[endpoint_class] * backlog / max(1, limits.max_in_flight)
+        return min(60, max(1, math.ceil(estimate)))
+
+    def _reject(self, endpoint_class: str, status_code: int, reason: str):
+        retry_after = self.retry_after(endpoint_class)
+        if settings.METRICS_ENABLED:
+            ADMISSION_REJECTED.labels(endpoint_class, reason).inc()
+        logger.warning(f"Rejecting {endpoint_class} request ({reason}), Retry-After {retry_after}s")
+        detail = "Server busy, retry later" if status_code == 503 else f"Too many {endpoint_class} requests queued"
+        raise AdmissionRejected(status_code, detail, retry_after)
+
+    # -- model execution slots ---------------------------------------------
+
+    @asynccontextmanager
+    async def slot(self, endpoint_class: str):
+        if self.slots_free > 0 and not self.slot_waiters:
+            self.slots_free -= 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self.slot_waiters, (self.limits[endpoint_class].priority, next(self._seq), future))
+            self.slot_waiting[endpoint_class] += 1
+            self._publish(endpoint_class)
+            try:
+                # The releaser takes the slot on our behalf before waking us
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release_slot()
+                raise
+            finally:
+                self.slot_waiting[endpoint_class] -= 1
+                self._publish(endpoint_class)
+        try:
+            yield
+        finally:
+            self._release_slot()
+
+    def _release_slot(self):
+        self.slots_free += 1
+        while self.slot_waiters and self.slots_free > 0:
+            _, _, future = heapq.heappop(self.slot_waiters)
+            if future.done():
+                continue
+            self.slots_free -= 1
+            future.set_result(True)
+
+    # -- reporting -----------------------------------------------------------
+
+    def _publish(self, endpoint_class: str):
+        if settings.METRICS_ENABLED:
+            ADMISSION_IN_FLIGHT.labels(endpoint_class).set(self.in_flight[endpoint_class])
+            ADMISSION_QUEUED.labels(endpoint_class).set(len(self.queues[endpoint_class]))
+            ADMISSION_SLOT_WAITING.labels(endpoint_class).set(self.slot_waiting[endpoint_class])
+
+    def snapshot(self) -> dict:
+        return {
+            name: {
+                "in_flight": self.in_flight[name],
+                "queued": len(self.queues[name]),
+                "waiting_for_model": self.slot_waiting[name],
+                "max_in_flight": limits.max_in_flight,
+                "max_queue": limits.max_queue,
+            }
+            for name, limits in self.limits.items()
+        }
+
+
+class _DisabledAdmission:
+    """
+    Used when ADMISSION_ENABLED is False: every request is accepted and waits
+    without limit, but model calls still share ADMISSION_MAX_CONCURRENT slots
+    so the thread pool never runs more of them at once.
+    """
+
+    def __init__(self, max_concurrent: int):
+        self.model_slots = asyncio.Semaphore(max_concurrent)
+
+    def admit(self, endpoint_class: str):
+        return nullcontext()
+
+    def slot(self, endpoint_class: str):
+        return self.model_slots
+
+    def snapshot(self) -> dict:
+        return {}
+
+
+def build_admission_controller():
+    if not settings.ADMISSION_ENABLED:
+        return _DisabledAdmission(settings.ADMISSION_MAX_CONCURRENT)
+    limits = {
+        "detect": EndpointLimits(0, settings.ADMISSION_DETECT_MAX_IN_FLIGHT, settings.ADMISSION_DETECT_MAX_QUEUE),
+        "ocr": EndpointLimits(1, settings.ADMISSION_OCR_MAX_IN_FLIGHT, settings.ADMISSION_OCR_MAX_QUEUE),
+        "batch": EndpointLimits(2, settings.ADMISSION_BATCH_MAX_IN_FLIGHT, settings.ADMISSION_BATCH_MAX_QUEUE),
+    }
+    return AdmissionController(limits, settings.ADMISSION_MAX_CONCURRENT, settings.ADMISSION_QUEUE_TIMEOUT)
@@ -0,0 +1,132 @@
+
+"""
+Check that the ONNX Runtime backend matches the torch backend for DBNet
+boxes and Doctr recognition texts, and report the speedup.
+
+    python -m benchmarks.backend_parity
+    python -m benchmarks.backend_parity --images-dir samples/ --box-tolerance 2
+
+Exits with status 1 when outputs diverge beyond the tolerances.
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import torch
+
+from acceleration import load_accelerated
+from benchmarks.precision_check import load_samples
+from onnx_backend import load_onnx_detector, load_onnx_recognizer
+
+
+def match_boxes(reference, candidate, tolerance: float) -> int:
+    """Count reference boxes with a candidate whose corners are all within `tolerance` pixels."""
+    matched = 0
+    remaining = list(candidate)
+    for ref in reference:
+        for i, cand in enumerate(remaining):
+            if max(abs(r - c) for r, c in zip(ref, cand)) <= tolerance:
+                matched += 1
+                del remaining[i]
+                break
+    return matched
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images-dir", help="directory of sample images (default: synthetic)")
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--width", type=int, default=1024)
+    parser.add_argument("--height", type=int, default=768)
+    parser.add_argument("--text-density", type=float, default=0.5)
+    parser.add_argument("--box-tolerance", type=float, default=2.0,
+                        help="maximum corner difference in pixels for a box to match")
+    parser.add_argument("--confidence-tolerance", type=float, default=0.01)
+    parser.add_argument("--min-match", type=float, default=0.99,
+                        help="fraction of boxes and texts that must match")
+    parser.add_argument("--output", help="optional JSON report path")
+    args = parser.parse_args(argv)
+
+    from doctr.models import detection_predictor, recognition_predictor
+
+    device = torch.device("cpu")
+
+    def build_detector(pretrained):
+        return detection_predictor(arch="db_resnet50", pretrained=pretrained, pretrained_backbone=False)
+
+    def build_recognizer(pretrained):
+        return recognition_predictor("crnn_vgg16_bn", pretrained=pretrained, pretrained_backbone=False)
+
+    detectors = {
+        "torch": load_accelerated("db_resnet50", build_detector, device, "fp32"),
+        "onnx": load_onnx_detector("db_resnet50", build_detector, device),
+    }
+    recognizers = {
+        "torch": load_accelerated("doctr_reco", build_recognizer, device, "fp32"),
+        "onnx": load_onnx_recognizer("doctr_reco", build_recognizer, device),
+    }
+
+    timings = {backend: {"dbnet": 0.0, "ocr": 0.0} for backend in detectors}
+    total_boxes = matched_boxes = 0
+    total_texts = matched_texts = 0
+    max_conf_diff = 0.0
+
+    for img_np in load_samples(args):
+        H, W = img_np.shape[:2]
+        boxes = {}
+        for backend, predictor in detectors.items():
+            t0 = time.perf_counter()
+            with torch.no_grad():
+                result = predictor([img_np])
+            timings[backend]["dbnet"] += time.perf_counter() - t0
+            words = result[0].get("words", np.empty((0, 5))) if result else np.empty((0, 5))
+            boxes[backend] = [[x1 * W, y1 * H, x2 * W, y2 * H] for x1, y1, x2, y2, _ in words]
+
+        total_boxes += len(boxes["torch"])
+        matched_boxes += match_boxes(boxes["torch"], boxes["onnx"], args.box_tolerance)
+
+        crops = [img_np[int(y1):int(y2), int(x1):int(x2)] for x1, y1, x2, y2 in boxes["torch"]
+                 if int(x2) > int(x1) and int(y2) > int(y1)]
+        if not crops:
+            continue
+        outputs = {}
+        for backend, predictor in recognizers.items():
+            t0 = time.perf_counter()
+            outputs[backend] = predictor(crops)
+            timings[backend]["ocr"] += time.perf_counter() - t0
+        for (ref_text, ref_conf), (text, conf) in zip(outputs["torch"], outputs["onnx"]):
+            total_texts += 1
+            conf_diff = abs(float(ref_conf) - float(conf))
+            max_conf_diff = max(max_conf_diff, conf_diff)
+            if ref_text == text and conf_diff <= args.confidence_tolerance:
+                matched_texts += 1
+
+    box_match = matched_boxes / total_boxes if total_boxes else 1.0
+    text_match = matched_texts / total_texts if total_texts else 1.0
+    report = {
+        "boxes": total_boxes,
+        "box_match": box_match,
+        "texts": total_texts,
+        "text_match": text_match,
+        "max_confidence_diff": max_conf_diff,
+        "timings": timings,
+        "speedup": {
+            stage: timings["torch"][stage] / timings["onnx"][stage] if timings["onnx"][stage] else 0.0
+            for stage in ("dbnet", "ocr")
+        },
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if box_match < args.min_match or text_match < args.min_match:
+        print("ONNX backend diverges from torch beyond the accepted tolerance")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
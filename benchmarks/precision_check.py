@@ -0,0 +1,169 @@
+
+"""
+Compare an INFERENCE_PRECISION mode against fp32 for DBNet detection and
+Doctr recognition on a sample set, so the accuracy/speed trade-off is known
+before enabling it.
+
+    python -m benchmarks.precision_check --precision int8
+    python -m benchmarks.precision_check --precision bf16 --images-dir samples/
+
+Exits with status 1 when agreement with fp32 falls below the given thresholds.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+from acceleration import PRECISION_MODES, inference_context, load_accelerated, resolve_precision
+from benchmarks.synthetic import make_image
+
+
+def box_iou(a, b) -> float:
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def char_error_rate(reference: str, hypothesis: str) -> float:
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    prev = list(range(len(hypothesis) + 1))
+    for i, rc in enumerate(reference, 1):
+        cur = [i]
+        for j, hc in enumerate(hypothesis, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (rc != hc)))
+        prev = cur
+    return prev[-1] / len(reference)
+
+
+def detect_boxes(predictor, precision, img_np):
+    with torch.no_grad(), inference_context(precision):
+        result = predictor([img_np])
+    H, W = img_np.shape[:2]
+    words = result[0].get("words", np.empty((0, 5))) if result else np.empty((0, 5))
+    return [[x1 * W, y1 * H, x2 * W, y2 * H] for x1, y1, x2, y2, _ in words]
+
+
+def recognize(predictor, precision, crops):
+    with inference_context(precision):
+        return [text for text, _ in predictor(crops)]
+
+
+def load_samples(args):
+    if args.images_dir:
+        paths = sorted(
+            os.path.join(args.images_dir, name) for name in os.listdir(args.images_dir)
+            if name.lower().endswith((".png", ".jpg", ".jpeg"))
+        )
+        return [np.array(Image.open(path).convert("RGB")) for path in paths[:args.images]]
+    return [np.array(make_image(args.width, args.height, args.text_density, seed=i)[0])
+            for i in range(args.images)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--precision", choices=[m for m in PRECISION_MODES if m != "fp32"], required=True)
+    parser.add_argument("--images-dir", help="directory of sample images (default: synthetic)")
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--width", type=int, default=1024)
+    parser.add_argument("--height", type=int, default=768)
+    parser.add_argument("--text-density", type=float, default=0.5)
+    parser.add_argument("--iou-threshold", type=float, default=0.5)
+    parser.add_argument("--min-box-recall", type=float, default=0.95,
+                        help="fraction of fp32 boxes that must be matched")
+    parser.add_argument("--max-cer", type=float, default=0.02,
+                        help="maximum mean character error rate versus fp32 texts")
+    parser.add_argument("--output", help="optional JSON report path")
+    args = parser.parse_args(argv)
+
+    from doctr.models import detection_predictor, recognition_predictor
+
+    device = torch.device("cpu")
+    precision = resolve_precision(device, args.precision)
+    if precision == "fp32":
+        print(f"{args.precision} is not available on this machine; nothing to compare")
+        return 0
+
+    def build_detector(pretrained):
+        return detection_predictor(arch="db_resnet50", pretrained=pretrained)
+
+    def build_recognizer(pretrained):
+        return recognition_predictor("crnn_vgg16_bn", pretrained=pretrained, pretrained_backbone=False)
+
+    # int8 does not apply to DBNet (see DBNetService), so its detector runs fp32
+    detector_precision = "fp32" if precision == "int8" else precision
+    detectors = {
+        "fp32": load_accelerated("db_resnet50", build_detector, device, "fp32"),
+        precision: load_accelerated("db_resnet50", build_detector, device, detector_precision),
+    }
+    recognizers = {
+        "fp32": load_accelerated("doctr_reco", build_recognizer, device, "fp32"),
+        precision: load_accelerated("doctr_reco", build_recognizer, device, precision),
+    }
+
+    samples = load_samples(args)
+    timings = {"fp32": {"dbnet": 0.0, "ocr": 0.0}, precision: {"dbnet": 0.0, "ocr": 0.0}}
+    matched = total_boxes = 0
+    cers = []
+    exact = 0
+
+    for img_np in samples:
+        boxes = {}
+        for mode in ("fp32", precision):
+            t0 = time.perf_counter()
+            boxes[mode] = detect_boxes(detectors[mode], mode, img_np)
+            timings[mode]["dbnet"] += time.perf_counter() - t0
+
+        for ref in boxes["fp32"]:
+            total_boxes += 1
+            if any(box_iou(ref, cand) >= args.iou_threshold for cand in boxes[precision]):
+                matched += 1
+
+        # Recognize the same fp32 crops with both models to isolate recognizer drift
+        crops = [img_np[int(y1):int(y2), int(x1):int(x2)] for x1, y1, x2, y2 in boxes["fp32"]
+                 if int(x2) > int(x1) and int(y2) > int(y1)]
+        if not crops:
+            continue
+        texts = {}
+        for mode in ("fp32", precision):
+            t0 = time.perf_counter()
+            texts[mode] = recognize(recognizers[mode], mode, crops)
+            timings[mode]["ocr"] += time.perf_counter() - t0
+        for ref, hyp in zip(texts["fp32"], texts[precision]):
+            cers.append(char_error_rate(ref, hyp))
+            exact += ref == hyp
+
+    box_recall = matched / total_boxes if total_boxes else 1.0
+    mean_cer = sum(cers) / len(cers) if cers else 0.0
+    report = {
+        "precision": precision,
+        "images": len(samples),
+        "box_recall": box_recall,
+        "text_exact_match": exact / len(cers) if cers else 1.0,
+        "mean_cer": mean_cer,
+        "timings": timings,
+        "speedup": {
+            stage: timings["fp32"][stage] / timings[precision][stage] if timings[precision][stage] else 0.0
+            for stage in ("dbnet", "ocr")
+        },
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if box_recall < args.min_box_recall or mean_cer > args.max_cer:
+        print(f"{precision} diverges from fp32 beyond the accepted thresholds")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
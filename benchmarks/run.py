@@ -0,0 +1,347 @@
+
+"""
+Benchmark the model services and HTTP endpoints on synthetic images.
+
+    python -m benchmarks.run --models stub --output bench.json
+    python -m benchmarks.run --models auto --baseline benchmarks/baseline.json
+    python -m benchmarks.run --models stub --save-baseline
+
+Exits with status 1 when a result regresses past --tolerance versus the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stubs import (
+    StubDBNetService,
+    StubOCRService,
+    StubSAM3Service,
+    install_stub_modules,
+)
+from benchmarks.synthetic import encode_png, make_image
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "benchmarks", "baseline.json")
+SERVICES = ("sam3", "dbnet", "ocr")
+
+
+def summarize(latencies: list[float], items_per_call: int = 1, wall_time: float = None) -> dict:
+    ordered = sorted(latencies)
+    total = wall_time if wall_time is not None else sum(latencies)
+    return {
+        "n": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "min": ordered[0],
+        "max": ordered[-1],
+        "throughput": (len(ordered) * items_per_call) / total if total > 0 else 0.0,
+    }
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return time.perf_counter() - t0, out
+
+
+# ---------------------------------------------------------------------------
+# Service selection
+# ---------------------------------------------------------------------------
+
+def _doctr_weights_present() -> bool:
+    cache_dir = os.environ.get("DOCTR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "doctr"))
+    models_dir = os.path.join(cache_dir, "models")
+    if not os.path.isdir(models_dir):
+        return False
+    names = os.listdir(models_dir)
+    return any(n.startswith("db_resnet50") for n in names) and any(n.startswith("crnn") for n in names)
+
+
+def resolve_backends(models: str) -> dict:
+    """Map each service to 'real' or 'stub' for --models stub|real|auto."""
+    if models in ("stub", "real"):
+        return {name: models for name in SERVICES}
+
+    from config import get_settings
+    settings = get_settings()
+    backends = {}
+    try:
+        import torch  # noqa: F401
+        import doctr  # noqa: F401
+        have_torch = True
+    except ImportError:
+        have_torch = False
+
+    backends["sam3"] = "real" if have_torch and os.path.exists(settings.SAM3_CHECKPOINT) else "stub"
+    doctr_ready = have_torch and _doctr_weights_present()
+    backends["dbnet"] = "real" if doctr_ready else "stub"
+    backends["ocr"] = "real" if doctr_ready else "stub"
+    return backends
+
+
+def load_services(backends: dict) -> dict:
+    services = {}
+    if backends["sam3"] == "real":
+        sys.path.insert(0, os.path.join(BASE_DIR, "sam3"))
+        from sam3_service import sam3_service
+        services["sam3"] = sam3_service
+    else:
+        services["sam3"] = StubSAM3Service()
+
+    if backends["dbnet"] == "real":
+        from dbnet_service import DBNetService
+        services["dbnet"] = DBNetService()
+    else:
+        services["dbnet"] = StubDBNetService()
+
+    if backends["ocr"] == "real":
+        from ocr_service import OCRService
+        services["ocr"] = OCRService()
+    else:
+        services["ocr"] = StubOCRService()
+    return services
+
+
+# ---------------------------------------------------------------------------
+# Workloads
+# ---------------------------------------------------------------------------
+
+def run_pipeline(services, image, prompts, ocr_model):
+    services["sam3"].detect(image, prompts)
+    regions = services["dbnet"].detect_text(image)
+    services["ocr"].extract_text(image, regions, model_name=ocr_model)
+
+
+def bench_single(services, samples, args) -> dict:
+    results = {}
+    stages = {
+        "sam3": lambda img, words: services["sam3"].detect(img, args.prompts),
+        "dbnet": lambda img, words: services["dbnet"].detect_text(img),
+        # Ground-truth boxes keep the OCR stage independent of detector output
+        "ocr": lambda img, words: services["ocr"].extract_text(
+            img, [{"box": w["box"]} for w in words], model_name=args.ocr_model
+        ),
+        "pipeline": lambda img, words: run_pipeline(services, img, args.prompts, args.ocr_model),
+    }
+    for name, fn in stages.items():
+        for img, words in samples[:args.warmup]:
+            fn(img, words)
+        latencies = []
+        for i in range(args.iterations):
+            img, words = samples[i % len(samples)]
+            latencies.append(timed(fn, img, words)[0])
+        results[f"single/{name}"] = summarize(latencies)
+    return results
+
+
+def bench_batch(services, samples, args) -> dict:
+    latencies = []
+    for i in range(args.iterations):
+        batch = [samples[(i * args.batch_size + j) % len(samples)][0] for j in range(args.batch_size)]
+        t0 = time.perf_counter()
+        for img in batch:
+            run_pipeline(services, img, args.prompts, args.ocr_model)
+        latencies.append(time.perf_counter() - t0)
+    return {"batch/pipeline": summarize(latencies, items_per_call=args.batch_size)}
+
+
+def bench_concurrent(services, samples, args) -> dict:
+    total = args.iterations * args.concurrency
+
+    def task(i):
+        img = samples[i % len(samples)][0]
+        return timed(run_pipeline, services, img, args.prompts, args.ocr_model)[0]
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(task, range(total)))
+    wall = time.perf_counter() - t0
+    return {"concurrent/pipeline": summarize(latencies, wall_time=wall)}
+
+
+def bench_endpoints(backends, samples, args) -> dict:
+    stubbed = [name for name, backend in backends.items() if backend == "stub"]
+    install_stub_modules(stubbed)
+    from fastapi.testclient import TestClient
+    import main
+
+    # One portal/event loop for every request thread: the admission
+    # controller resolves loop-bound futures and needs a single loop
+    with TestClient(main.app) as client:
+        payloads = [(encode_png(img), words) for img, words in samples]
+        prompts = ",".join(args.prompts)
+
+        def detect(i):
+            png, _ = payloads[i % len(payloads)]
+            return client.post("/api/detect", files={"file": ("bench.png", png, "image/png")},
+                               data={"prompts": prompts})
+
+        def batch_detect(i):
+            files = [("files", (f"bench_{j}.png", payloads[(i + j) % len(payloads)][0], "image/png"))
+                     for j in range(args.batch_size)]
+            return client.post("/api/batch-detect", files=files,
+                               data={"prompts": prompts, "thresholds": "{}"})
+
+        def extract_text(i):
+            png, words = payloads[i % len(payloads)]
+            return client.post("/api/extract-text", files={"file": ("bench.png", png, "image/png")},
+                               data={"regions": json.dumps([{"box": w["box"]} for w in words]),
+                                     "model": args.ocr_model})
+
+        results = {}
+        endpoints = {"detect": (detect, 1), "batch-detect": (batch_detect, args.batch_size),
+                     "extract-text": (extract_text, 1)}
+        for name, (fn, items) in endpoints.items():
+            def call(i, name=name, fn=fn):
+                # Admission rejections (429/503) must not count as fast successes
+                elapsed, response = timed(fn, i)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{name} returned {response.status_code}: {response.text}")
+                return elapsed
+
+            for i in range(args.warmup):
+                call(i)
+            latencies = [call(i) for i in range(args.iterations)]
+            results[f"endpoint/{name}"] = summarize(latencies, items_per_call=items)
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                latencies = list(pool.map(call, range(args.iterations * args.concurrency)))
+            results[f"endpoint-concurrent/{name}"] = summarize(
+                latencies, items_per_call=items, wall_time=time.perf_counter() - t0
+            )
+        return results
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return human-readable regressions (slower p50 or lower throughput)."""
+    if current["meta"]["config"] != baseline["meta"]["config"]:
+        print("WARNING: benchmark config differs from baseline; comparison may be meaningless")
+
+    regressions = []
+    print(f"{'benchmark':32} {'p50':>10} {'base p50':>10} {'thrpt':>10} {'base thrpt':>10}")
+    for key, stats in sorted(current["results"].items()):
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"{key:32} {stats['p50']:>10.4f} {'-':>10} {stats['throughput']:>10.2f} {'-':>10}")
+            continue
+        print(f"{key:32} {stats['p50']:>10.4f} {base['p50']:>10.4f} "
+              f"{stats['throughput']:>10.2f} {base['throughput']:>10.2f}")
+        if stats["p50"] > base["p50"] * (1 + tolerance):
+            regressions.append(f"{key}: p50 {base['p50']:.4f}s -> {stats['p50']:.4f}s")
+        if stats["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {base['throughput']:.2f}/s -> {stats['throughput']:.2f}/s")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", choices=("stub", "real", "auto"), default="auto",
+                        help="stand-in models, real weights, or real where available (default)")
+    parser.add_argument("--workloads", default="single,batch,concurrent,endpoints",
+                        help="comma-separated subset of single,batch,concurrent,endpoints")
+    parser.add_argument("--width", type=int, default=1024)
+    parser.add_argument("--height", type=int, default=768)
+    parser.add_argument("--text-density", type=float, default=0.5,
+                        help="fraction of text lines filled with words (0.0-1.0)")
+    parser.add_argument("--images", type=int, default=4, help="distinct synthetic images")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--prompts", type=lambda s: [p.strip() for p in s.split(",") if p.strip()],
+                        default=["box", "label"])
+    parser.add_argument("--ocr-model", default="doctr")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed relative slowdown before flagging a regression")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write these results to --baseline instead of comparing")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workloads = [w.strip() for w in args.workloads.split(",") if w.strip()]
+
+    backends = resolve_backends(args.models)
+    print(f"Model backends: {backends}")
+    samples = [make_image(args.width, args.height, args.text_density, seed=args.seed + i)
+               for i in range(args.images)]
+
+    results = {}
+    services = None
+    for workload in workloads:
+        if workload == "endpoints":
+            results.update(bench_endpoints(backends, samples, args))
+            continue
+        if services is None:
+            services = load_services(backends)
+        if workload == "single":
+            results.update(bench_single(services, samples, args))
+        elif workload == "batch":
+            results.update(bench_batch(services, samples, args))
+        elif workload == "concurrent":
+            results.update(bench_concurrent(services, samples, args))
+        else:
+            raise ValueError(f"Unknown workload: {workload}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backends": backends,
+            "config": {
+                "width": args.width, "height": args.height, "text_density": args.text_density,
+                "images": args.images, "iterations": args.iterations, "batch_size": args.batch_size,
+                "concurrency": args.concurrency, "prompts": args.prompts, "ocr_model": args.ocr_model,
+                "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["meta"]["backends"] != backends:
+        print(f"WARNING: baseline used backends {baseline['meta']['backends']}")
+
+    regressions = compare(report, baseline, args.tolerance)
+    if regressions:
+        print("Regressions detected:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
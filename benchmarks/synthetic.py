@@ -0,0 +1,53 @@
+
+import io
+import random
+
+from PIL import Image, ImageDraw, ImageFont
+
+WORDS = (
+    "invoice", "total", "amount", "date", "serial", "model", "batch", "lot",
+    "expiry", "weight", "net", "qty", "ref", "part", "code", "label",
+)
+
+
+def make_image(width: int = 1024, height: int = 768, text_density: float = 0.5, seed: int = 0):
+    """
+    Generate a synthetic document-like image.
+    `text_density` (0.0-1.0) is the fraction of text lines that are filled with
+    words; a few filled rectangles stand in for objects for SAM3.
+    Returns (PIL image, list of {"box": [x1, y1, x2, y2], "text": str}).
+    """
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+
+    # Object-like shapes
+    for _ in range(3):
+        w, h = rng.randint(width // 10, width // 4), rng.randint(height // 10, height // 4)
+        x, y = rng.randint(0, width - w), rng.randint(0, height - h)
+        color = tuple(rng.randint(40, 200) for _ in range(3))
+        draw.rectangle([x, y, x + w, y + h], outline=color, width=3)
+
+    words = []
+    line_height = 24
+    for y in range(16, height - line_height, line_height):
+        if rng.random() >= text_density:
+            continue
+        x = 16
+        while x < width - 120:
+            text = rng.choice(WORDS)
+            if rng.random() < 0.3:
+                text += str(rng.randint(0, 9999))
+            x1, y1, x2, y2 = draw.textbbox((x, y), text, font=font)
+            draw.text((x, y), text, fill=(0, 0, 0), font=font)
+            words.append({"box": [x1, y1, x2, y2], "text": text})
+            x = x2 + rng.randint(12, 40)
+
+    return image, words
+
+
+def encode_png(image: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
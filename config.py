@@ -1,5 +1,6 @@
 
 import os
+import tempfile
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -23,9 +24,47 @@ class Settings(BaseSettings):
     DEVICE: str = "cuda" # or "cpu"
     LAZY_LOAD_MODELS: bool = True
     
+    # CPU inference acceleration for DBNet / Doctr recognition
+    INFERENCE_PRECISION: str = "fp32" # "fp32", "int8", "bf16" or "channels_last"
+    TORCH_COMPILE: bool = False
+    ACCELERATION_CACHE_DIR: str = os.path.join(BASE_DIR, "checkpoints", "accelerated")
+    
+    # Inference backend for DBNet / Doctr recognition
+    INFERENCE_BACKEND: str = "torch" # "torch" or "onnx"
+    ONNX_CACHE_DIR: str = os.path.join(BASE_DIR, "checkpoints", "onnx")
+    ORT_INTRA_OP_THREADS: int = 0 # 0 lets ONNX Runtime pick
+    ORT_INTER_OP_THREADS: int = 1
+    
     # Caching
     OCR_CACHE_SIZE: int = 128
     
+    # Serving (SERVE_WORKERS > 1 pre-forks workers that share model weights; DEVICE=cpu only)
+    SERVE_WORKERS: int = 1
+    WORKER_TORCH_THREADS: int = 0 # 0 = cpu_count // SERVE_WORKERS
+    
+    # Metrics
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: str = os.path.join(tempfile.gettempdir(), "sam3_rapid_metrics")
+
+    # Admission control (per endpoint class: detect, ocr, batch)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENT: int = 1 # Model calls running at once, shared by all classes
+    ADMISSION_QUEUE_TIMEOUT: float = 30.0
+    ADMISSION_DETECT_MAX_IN_FLIGHT: int = 4
+    ADMISSION_DETECT_MAX_QUEUE: int = 16
+    ADMISSION_OCR_MAX_IN_FLIGHT: int = 4
+    ADMISSION_OCR_MAX_QUEUE: int = 16
+    ADMISSION_BATCH_MAX_IN_FLIGHT: int = 1
+    ADMISSION_BATCH_MAX_QUEUE: int = 4
+
+    # Profiling (opt-in per request via header/query flag, or sampled)
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_BACKEND: str = "cprofile" # "torch", "cprofile" or "both"
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_DIR: str = os.path.join(BASE_DIR, "profiles")
+    PROFILING_MAX_FILES: int = 200 # oldest trace files beyond this are deleted; 0 = keep all
+
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -8,6 +8,8 @@ from threading import Lock
 
 from config import get_settings
 from logger import get_logger, log_performance
+from acceleration import inference_context, load_accelerated, resolve_precision
+from onnx_backend import load_onnx_detector, resolve_backend
 
 settings = get_settings()
 logger = get_logger("dbnet_service")
@@ -29,7 +31,13 @@ class DBNetService:
             return
             
         self.device = torch.device("cuda" if torch.cuda.is_available() and settings.DEVICE == "cuda" else "cpu")
-        logger.info(f"DBNetService initialized. Device: {self.device}")
+        self.backend = resolve_backend()
+        self.precision = resolve_precision(self.device)
+        if self.precision == "int8":
+            # Dynamic quantization only covers Linear/LSTM layers; DBNet is all convolutions
+            logger.info("INFERENCE_PRECISION=int8 does not apply to DBNet; using fp32")
+            self.precision = "fp32"
+        logger.info(f"DBNetService initialized. Device: {self.device}, backend: {self.backend}, precision: {self.precision}")
         
         self.model = None
         self.load_lock = Lock()
@@ -46,8 +54,16 @@ class DBNetService:
             logger.info("Loading DBNet model...")
             t0 = time.time()
             # Initialize pretrained DBNet (ResNet50 backbone)
-            self.model = detection_predictor(arch='db_resnet50', pretrained=True).to(self.device).eval()
-            log_performance(logger, "DBNet Model Load", time.time() - t0)
+            # Full pretrained weights include the backbone; skip its separate
+            # download so a cached ONNX/int8 model loads without weight I/O
+            build_predictor = lambda pretrained: detection_predictor(
+                arch='db_resnet50', pretrained=pretrained, pretrained_backbone=False
+            )
+            if self.backend == "onnx":
+                self.model = load_onnx_detector("db_resnet50", build_predictor, self.device)
+            else:
+                self.model = load_accelerated("db_resnet50", build_predictor, self.device, self.precision)
+            log_performance(logger, "DBNet Model Load", time.time() - t0, stage="model_load", model="dbnet")
 
     def detect_text(self, image_input):
         """
@@ -69,7 +85,7 @@ class DBNetService:
 
         try:
             # Doctr expects a list of numpy images
-            with torch.no_grad():
+            with torch.no_grad(), inference_context(self.precision):
                 result = self.model([img_np])
 
             img_H, img_W = img_np.shape[:2]
@@ -98,7 +114,7 @@ class DBNetService:
                             "confidence": float(score)
                         })
             
-            log_performance(logger, "DBNet Inference", time.time() - t0, {"detections": len(detections)})
+            log_performance(logger, "DBNet Inference", time.time() - t0, {"detections": len(detections)}, stage="dbnet")
             return detections
             
         except Exception as e:
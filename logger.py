@@ -2,6 +2,7 @@
 import logging
 import sys
 from config import get_settings
+from metrics import observe_operation
 
 settings = get_settings()
 
@@ -26,10 +27,14 @@ def get_logger(name: str):
         
     return logger
 
-def log_performance(logger, operation: str, duration: float, metadata: dict = None):
+def log_performance(logger, operation: str, duration: float, metadata: dict = None,
+                    stage: str = None, model: str = None):
     """
     Log performance metrics in a structured way.
+    Also records the duration in the Prometheus registry; pass `stage`
+    (and optionally `model`) to feed the per-stage / model-load histograms.
     """
+    observe_operation(operation, duration, stage=stage, model=model)
     msg = f"[PERF] {operation} completed in {duration:.4f}s"
     if metadata:
         msg += f" | {metadata}"
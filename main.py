@@ -1,8 +1,9 @@
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 import os
 import io
@@ -15,6 +16,9 @@ from PIL import Image
 from config import get_settings
 from logger import get_logger, log_performance
 from middleware import performance_logging_middleware
+from metrics import observe_batch_size, observe_stage, render_latest
+from profiling import start_session
+from admission import build_admission_controller
 
 # Initialize Infrastructure
 settings = get_settings()
@@ -33,6 +37,7 @@ dbnet_service = DBNetService()
 ocr_service = OCRService()
 
 app = FastAPI(title=settings.API_TITLE, version=settings.API_VERSION)
+admission = build_admission_controller()
 
 # Middleware
 app.add_middleware(
@@ -51,6 +56,13 @@ os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 # Mount static files
 app.mount("/static", StaticFiles(directory=settings.STATIC_DIR), name="static")
 
+def decode_image(contents: bytes) -> Image.Image:
+    """Decode uploaded bytes to an RGB image, recording the decode stage latency."""
+    t0 = time.time()
+    image = Image.open(io.BytesIO(contents)).convert("RGB")
+    observe_stage("decode", time.time() - t0)
+    return image
+
 @app.get("/")
 async def read_root():
     return FileResponse(os.path.join(settings.STATIC_DIR, "index.html"))
@@ -73,55 +85,71 @@ async def detailed_health():
         "config": {
             "device": settings.DEVICE,
             "lazy_load": settings.LAZY_LOAD_MODELS
-        }
+        },
+        "admission": admission.snapshot()
     }
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
+
 @app.post("/api/detect")
-async def detect_objects(file: UploadFile = File(...), prompts: str = Form(...)):
+async def detect_objects(request: Request, file: UploadFile = File(...), prompts: str = Form(...)):
     """
     Run SAM3 detection on a single uploaded image.
     """
-    try:
-        t0 = time.time()
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents)).convert("RGB")
-        
-        prompt_list = [p.strip() for p in prompts.split(",") if p.strip()]
-        if not prompt_list:
-            raise HTTPException(status_code=400, detail="No prompt provided")
+    profile = start_session(request)
+    async with admission.admit("detect"):
+        try:
+            t0 = time.time()
+            contents = await file.read()
+            image = decode_image(contents)
+            
+            prompt_list = [p.strip() for p in prompts.split(",") if p.strip()]
+            if not prompt_list:
+                raise HTTPException(status_code=400, detail="No prompt provided")
+                
+            async with admission.slot("detect"):
+                # Run SAM3
+                t_sam_start = time.time()
+                results = await run_in_threadpool(profile.call, "sam3", sam3_service.detect, image, prompt_list)
+                t_sam_end = time.time()
+                
+                # Run DBNet
+                t_db_start = time.time()
+                text_regions = await run_in_threadpool(profile.call, "dbnet", dbnet_service.detect_text, image)
+                t_db_end = time.time()
             
-        # Run SAM3
-        t_sam_start = time.time()
-        results = sam3_service.detect(image, prompt_list)
-        t_sam_end = time.time()
-        
-        # Run DBNet
-        t_db_start = time.time()
-        text_regions = dbnet_service.detect_text(image)
-        t_db_end = time.time()
-        
-        total_duration = time.time() - t0
-        
-        width, height = image.size
-        
-        return {
-            "status": "success",
-            "image_dims": {"width": width, "height": height},
-            "results": results,
-            "text_regions": text_regions,
-            "timings": {
-                "sam3": t_sam_end - t_sam_start,
-                "dbnet": t_db_end - t_db_start,
-                "total": total_duration
+            total_duration = time.time() - t0
+            
+            width, height = image.size
+            
+            response = {
+                "status": "success",
+                "image_dims": {"width": width, "height": height},
+                "results": results,
+                "text_regions": text_regions,
+                "timings": {
+                    "sam3": t_sam_end - t_sam_start,
+                    "dbnet": t_db_end - t_db_start,
+                    "total": total_duration
+                }
             }
-        }
-        
-    except Exception as e:
-        logger.error(f"Detection error: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+            if profile.trace_id:
+                response["profile_trace_id"] = profile.trace_id
+            return response
+            
+        except Exception as e:
+            logger.error(f"Detection error: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/batch-detect")
 async def batch_detect(
+    request: Request,
     files: list[UploadFile] = File(...),
     prompts: str = Form(...),
     thresholds: str = Form(...) 
@@ -129,63 +157,82 @@ async def batch_detect(
     """
     Run detection on multiple images.
     """
-    try:
-        prompt_list = [p.strip() for p in prompts.split(",") if p.strip()]
-        threshold_map = json.loads(thresholds)
-        batch_results = []
-        
-        t0 = time.time()
-        
-        for file in files:
-            contents = await file.read()
-            image = Image.open(io.BytesIO(contents)).convert("RGB")
+    profile = start_session(request)
+    async with admission.admit("batch"):
+        try:
+            prompt_list = [p.strip() for p in prompts.split(",") if p.strip()]
+            threshold_map = json.loads(thresholds)
+            batch_results = []
             
-            raw_results = sam3_service.detect(image, prompt_list)
+            t0 = time.time()
+            observe_batch_size(len(files))
             
-            file_summary = {
-                "filename": file.filename,
-                "counts": {}
+            for file in files:
+                contents = await file.read()
+                image = decode_image(contents)
+                
+                # One slot per image so interactive requests can overtake the batch
+                async with admission.slot("batch"):
+                    raw_results = await run_in_threadpool(
+                        profile.call, "sam3", sam3_service.detect, image, prompt_list
+                    )
+                
+                file_summary = {
+                    "filename": file.filename,
+                    "counts": {}
+                }
+                
+                for res in raw_results:
+                    cls = res["class"]
+                    thresh = float(threshold_map.get(cls, 0.5))
+                    valid_dets = [d for d in res["detections"] if d["score"] >= thresh]
+                    file_summary["counts"][cls] = len(valid_dets)
+                
+                batch_results.append(file_summary)
+                
+            log_performance(logger, "Batch Detection", time.time() - t0, {"files": len(files)}, stage="batch")
+                
+            response = {
+                "status": "success",
+                "batch_summary": batch_results
             }
-            
-            for res in raw_results:
-                cls = res["class"]
-                thresh = float(threshold_map.get(cls, 0.5))
-                valid_dets = [d for d in res["detections"] if d["score"] >= thresh]
-                file_summary["counts"][cls] = len(valid_dets)
-            
-            batch_results.append(file_summary)
-            
-        log_performance(logger, "Batch Detection", time.time() - t0, {"files": len(files)})
-            
-        return {
-            "status": "success",
-            "batch_summary": batch_results
-        }
-    except Exception as e:
-        logger.error(f"Batch detection error: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+            if profile.trace_id:
+                response["profile_trace_id"] = profile.trace_id
+            return response
+        except Exception as e:
+            logger.error(f"Batch detection error: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/extract-text")
 async def extract_text_api(
+    request: Request,
     file: UploadFile = File(...),
     regions: str = Form(...), 
     model: str = Form("doctr")
 ):
-    try:
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents)).convert("RGB")
-        region_list = json.loads(regions)
-        
-        extracted_data, perf_stats = ocr_service.extract_text(image, region_list, model_name=model)
-        
-        return {
-            "status": "success",
-            "extracted_text": extracted_data,
-            "perf_stats": perf_stats
-        }
-    except Exception as e:
-        logger.error(f"Text extraction error: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+    profile = start_session(request)
+    async with admission.admit("ocr"):
+        try:
+            contents = await file.read()
+            image = decode_image(contents)
+            region_list = json.loads(regions)
+            
+            async with admission.slot("ocr"):
+                extracted_data, perf_stats = await run_in_threadpool(
+                    profile.call, f"ocr_{model}", ocr_service.extract_text, image, region_list, model_name=model
+                )
+            
+            response = {
+                "status": "success",
+                "extracted_text": extracted_data,
+                "perf_stats": perf_stats
+            }
+            if profile.trace_id:
+                response["profile_trace_id"] = profile.trace_id
+            return response
+        except Exception as e:
+            logger.error(f"Text extraction error: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     logger.info("="*50)
@@ -193,9 +240,13 @@ if __name__ == "__main__":
     logger.info(f"Access at: http://{settings.API_HOST}:{settings.API_PORT}")
     logger.info("="*50)
     
-    uvicorn.run(
-        "main:app", 
-        host=settings.API_HOST, 
-        port=settings.API_PORT, 
-        reload=settings.DEBUG
-    )
+    if settings.SERVE_WORKERS > 1:
+        from serve import run_prefork
+        run_prefork(app)
+    else:
+        uvicorn.run(
+            "main:app", 
+            host=settings.API_HOST, 
+            port=settings.API_PORT, 
+            reload=settings.DEBUG
+        )
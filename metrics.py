@@ -0,0 +1,141 @@
+
+import atexit
+import os
+import shutil
+
+from config import get_settings
+
+settings = get_settings()
+
+if settings.SERVE_WORKERS > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    # Pre-forked workers aggregate metrics through files in this directory.
+    # Must be set before prometheus_client is imported; this runs once in the
+    # parent, before any worker is forked. Scoped to the parent's PID so other
+    # processes importing this module never touch a running server's files.
+    _multiproc_dir = os.path.join(settings.METRICS_MULTIPROC_DIR, str(os.getpid()))
+    shutil.rmtree(_multiproc_dir, ignore_errors=True)
+    os.makedirs(_multiproc_dir, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = _multiproc_dir
+    # Workers leave through os._exit, so only the parent runs this
+    atexit.register(shutil.rmtree, _multiproc_dir, ignore_errors=True)
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Buckets tuned for model inference: sub-10ms decode up to multi-second batches
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LOAD_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route and status code",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being processed",
+    ["route"],
+    multiprocess_mode="livesum",
+)
+STAGE_LATENCY = Histogram(
+    "pipeline_stage_duration_seconds",
+    "Latency of individual pipeline stages (decode, sam3, dbnet, ocr)",
+    ["stage", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+MODEL_LOAD_LATENCY = Histogram(
+    "model_load_duration_seconds",
+    "Time spent loading model weights",
+    ["model"],
+    buckets=LOAD_BUCKETS,
+)
+OPERATION_LATENCY = Histogram(
+    "perf_operation_duration_seconds",
+    "Every operation reported through log_performance",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+BATCH_SIZE = Histogram(
+    "batch_detect_images",
+    "Number of images per batch-detect request",
+    buckets=COUNT_BUCKETS,
+)
+CROPS_PER_REQUEST = Histogram(
+    "ocr_crops_per_request",
+    "Number of text crops sent to OCR per request",
+    ["model"],
+    buckets=COUNT_BUCKETS,
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Admitted requests per endpoint class",
+    ["endpoint_class"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUED = Gauge(
+    "admission_queue_depth",
+    "Requests waiting for admission per endpoint class",
+    ["endpoint_class"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_SLOT_WAITING = Gauge(
+    "admission_model_slot_waiting",
+    "Admitted requests waiting for a model execution slot",
+    ["endpoint_class"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Requests rejected by admission control",
+    ["endpoint_class", "reason"],
+)
+
+
+def observe_operation(operation: str, duration: float, stage: str = None, model: str = None):
+    """
+    Record a log_performance call. `stage="model_load"` routes to the load
+    histogram, any other stage to the per-stage histogram.
+    """
+    if not settings.METRICS_ENABLED:
+        return
+    OPERATION_LATENCY.labels(operation).observe(duration)
+    if stage == "model_load":
+        MODEL_LOAD_LATENCY.labels(model or operation).observe(duration)
+    elif stage:
+        STAGE_LATENCY.labels(stage, model or "").observe(duration)
+
+
+def observe_stage(stage: str, duration: float, model: str = ""):
+    if settings.METRICS_ENABLED:
+        STAGE_LATENCY.labels(stage, model).observe(duration)
+
+
+def observe_batch_size(count: int):
+    if settings.METRICS_ENABLED:
+        BATCH_SIZE.observe(count)
+
+
+def observe_crops(model: str, count: int):
+    if settings.METRICS_ENABLED:
+        CROPS_PER_REQUEST.labels(model).observe(count)
+
+
+def render_latest():
+    """Return (payload, content_type) for the /metrics endpoint."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Aggregate across all pre-forked workers
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
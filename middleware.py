@@ -1,22 +1,44 @@
 
 import time
 from fastapi import Request
+from starlette.routing import Match
 from logger import get_logger
+from metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT
+from config import get_settings
 
+settings = get_settings()
 logger = get_logger("middleware")
 
+def _route_label(request: Request) -> str:
+    """Resolve the route template (e.g. '/static') to keep label cardinality bounded."""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
 async def performance_logging_middleware(request: Request, call_next):
     start_time = time.time()
-    
-    # Process request
-    response = await call_next(request)
-    
-    # Calculate duration
-    process_time = time.time() - start_time
-    
+
+    route = _route_label(request) if settings.METRICS_ENABLED else None
+    status_code = 500
+    if route is not None:
+        REQUESTS_IN_FLIGHT.labels(route).inc()
+
+    try:
+        # Process request
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        # Calculate duration
+        process_time = time.time() - start_time
+        if route is not None:
+            REQUESTS_IN_FLIGHT.labels(route).dec()
+            REQUEST_LATENCY.labels(request.method, route, str(status_code)).observe(process_time)
+
     # Log request details
     logger.info(
         f"{request.method} {request.url.path} - {response.status_code} - {process_time:.4f}s"
     )
-    
+
     return response
@@ -8,6 +8,9 @@ from functools import lru_cache
 
 from config import get_settings
 from logger import get_logger, log_performance
+from metrics import observe_crops
+from acceleration import inference_context, load_accelerated, resolve_precision
+from onnx_backend import load_onnx_recognizer, resolve_backend
 
 settings = get_settings()
 logger = get_logger("ocr_service")
@@ -29,7 +32,10 @@ class OCRService:
             return
             
         self.device = torch.device("cuda" if torch.cuda.is_available() and settings.DEVICE == "cuda" else "cpu")
-        logger.info(f"OCRService initialized. Device: {self.device}")
+        # Backend and precision mode for the Doctr recognizer
+        self.backend = resolve_backend()
+        self.precision = resolve_precision(self.device)
+        logger.info(f"OCRService initialized. Device: {self.device}, doctr backend: {self.backend}, precision: {self.precision}")
         
         # Models cache
         self.models = {}
@@ -50,10 +56,17 @@ class OCRService:
                 
             logger.info("Loading Doctr model...")
             t0 = time.time()
-            from doctr.models import ocr_predictor
-            # Pretrained defaults to True
-            self.models['doctr'] = ocr_predictor(pretrained=True).reco_predictor.to(self.device).eval()
-            log_performance(logger, "Doctr Load", time.time() - t0)
+            from doctr.models import recognition_predictor
+            # Recognizer only: no detector, and no backbone download when the
+            # weights come from a cache
+            build_predictor = lambda pretrained: recognition_predictor(
+                "crnn_vgg16_bn", pretrained=pretrained, pretrained_backbone=False
+            )
+            if self.backend == "onnx":
+                self.models['doctr'] = load_onnx_recognizer("doctr_reco", build_predictor, self.device)
+            else:
+                self.models['doctr'] = load_accelerated("doctr_reco", build_predictor, self.device, self.precision)
+            log_performance(logger, "Doctr Load", time.time() - t0, stage="model_load", model="doctr")
     
     def _load_easyocr(self):
         if 'easyocr' in self.models:
@@ -67,7 +80,7 @@ class OCRService:
             t0 = time.time()
             import easyocr
             self.models['easyocr'] = easyocr.Reader(['en'], gpu=(self.device.type == 'cuda'))
-            log_performance(logger, "EasyOCR Load", time.time() - t0)
+            log_performance(logger, "EasyOCR Load", time.time() - t0, stage="model_load", model="easyocr")
 
     def _load_paddle(self):
         if 'paddle' in self.models:
@@ -99,7 +112,7 @@ class OCRService:
             use_gpu = (self.device.type == 'cuda')
             logger.info(f"Initializing PaddleOCR with use_gpu={use_gpu}, enable_mkldnn=False, det=False, rec_batch_num=1")
             self.models['paddle'] = PaddleOCR(use_angle_cls=True, lang='en', use_gpu=use_gpu, enable_mkldnn=False, det=False, rec_batch_num=1)
-            log_performance(logger, "PaddleOCR Load", time.time() - t0)
+            log_performance(logger, "PaddleOCR Load", time.time() - t0, stage="model_load", model="paddle")
 
     def extract_text(self, image_input, text_regions, model_name='doctr'):
         """
@@ -149,7 +162,8 @@ class OCRService:
             if model_name == 'doctr':
                 self._load_doctr()
                 # Doctr recognition_predictor expects list of numpy arrays
-                out = self.models['doctr'](crops)
+                with inference_context(self.precision):
+                    out = self.models['doctr'](crops)
                 
                 for i, word_out in enumerate(out):
                     text, confidence = word_out[0], word_out[1]
@@ -250,7 +264,8 @@ class OCRService:
         log_performance(logger, f"OCR ({model_name})", t_inference, {
             "crops": len(crops),
             "preprocess": f"{t_preprocess:.4f}s"
-        })
+        }, stage="ocr", model=model_name)
+        observe_crops(model_name, len(crops))
         
         return results, {
             "preprocess": t_preprocess,
@@ -0,0 +1,197 @@
+
+import importlib
+import os
+from threading import Lock
+
+import numpy as np
+import torch
+
+from config import get_settings
+from logger import get_logger
+
+settings = get_settings()
+logger = get_logger("onnx_backend")
+
+INFERENCE_BACKENDS = ("torch", "onnx")
+
+
+def resolve_backend() -> str:
+    backend = settings.INFERENCE_BACKEND
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND: {backend}")
+    return backend
+
+
+def _onnx_path(name: str) -> str:
+    import doctr
+    filename = f"{name}_doctr{doctr.__version__}.onnx"
+    return os.path.join(settings.ONNX_CACHE_DIR, filename.replace("+", "_"))
+
+
+def export_onnx(name: str, model: torch.nn.Module, input_shape: tuple) -> str:
+    """
+    Export a doctr model's raw logits to ONNX with a dynamic batch axis.
+    doctr models return {"logits": ...} and skip post-processing when
+    `exportable` is set; post-processing stays in Python.
+    """
+    path = _onnx_path(name)
+    os.makedirs(settings.ONNX_CACHE_DIR, exist_ok=True)
+    dummy_input = torch.rand((1, *input_shape), dtype=torch.float32)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    model = model.cpu().eval()
+    model.exportable = True
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                dummy_input,
+                tmp_path,
+                input_names=["input"],
+                output_names=["logits"],
+                dynamic_axes={"input": {0: "batch_size"}, "logits": {0: "batch_size"}},
+                opset_version=17,
+            )
+    finally:
+        model.exportable = False
+    # Atomic so concurrent workers never load a half-written file
+    os.replace(tmp_path, path)
+    logger.info(f"Exported {name} to {path}")
+    return path
+
+
+def create_session(path: str, device: torch.device):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if settings.ORT_INTRA_OP_THREADS > 0:
+        options.intra_op_num_threads = settings.ORT_INTRA_OP_THREADS
+    options.inter_op_num_threads = settings.ORT_INTER_OP_THREADS
+    if settings.ORT_INTER_OP_THREADS > 1:
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+    providers = ["CPUExecutionProvider"]
+    if device.type == "cuda" and "CUDAExecutionProvider" in ort.get_available_providers():
+        providers.insert(0, "CUDAExecutionProvider")
+    return ort.InferenceSession(path, sess_options=options, providers=providers)
+
+
+class _OnnxPredictor:
+    """
+    Base for ORT-backed predictors. Reuses the doctr predictor's pre- and
+    post-processing; only the network runs in ONNX Runtime.
+    """
+
+    def __init__(self, name: str, predictor, device: torch.device):
+        self.predictor = predictor
+        self.device = device
+        self.pre_processor = predictor.pre_processor
+        model = predictor.model
+        self.postprocessor = model.postprocessor
+        self.class_names = getattr(model, "class_names", None)
+        self.assume_straight_pages = getattr(model, "assume_straight_pages", True)
+
+        self.onnx_path = _onnx_path(name)
+        if not os.path.exists(self.onnx_path):
+            input_shape = (3, *self.pre_processor.resize.size)
+            export_onnx(name, model, input_shape)
+
+        # Only the ORT session runs the network; drop the torch weights
+        predictor.model = None
+        del model
+
+        self._session = None
+        self._session_pid = None
+        self._session_lock = Lock()
+
+    @property
+    def session(self):
+        # ORT thread pools do not survive fork; build one session per process.
+        # Each session holds its own copy of the weights (see README)
+        if self._session is None or self._session_pid != os.getpid():
+            with self._session_lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    self._session = create_session(self.onnx_path, self.device)
+                    self._session_pid = os.getpid()
+        return self._session
+
+    def _run(self, batch: torch.Tensor) -> np.ndarray:
+        return self.session.run(None, {"input": batch.cpu().numpy().astype(np.float32)})[0]
+
+
+class OnnxDetectionPredictor(_OnnxPredictor):
+    """Drop-in for doctr's DetectionPredictor: pages -> [{class_name: boxes}]."""
+
+    def __call__(self, pages):
+        preds = []
+        for batch in self.pre_processor(pages):
+            logits = self._run(batch)
+            # Sigmoid as in DBNet.forward, channels-last for the postprocessor
+            prob_map = 0.5 * (1.0 + np.tanh(0.5 * logits))
+            preds.extend(
+                dict(zip(self.class_names, page_preds))
+                for page_preds in self.postprocessor(prob_map.transpose(0, 2, 3, 1))
+            )
+
+        # Newer doctr removes letterbox padding inside the detection predictor
+        predictor_module = importlib.import_module(type(self.predictor).__module__)
+        remove_padding = getattr(predictor_module, "_remove_padding", None)
+        if remove_padding is not None:
+            preds = remove_padding(
+                pages,
+                preds,
+                preserve_aspect_ratio=self.pre_processor.resize.preserve_aspect_ratio,
+                symmetric_pad=self.pre_processor.resize.symmetric_pad,
+                assume_straight_pages=self.assume_straight_pages,
+            )
+        return preds
+
+
+class OnnxRecognitionPredictor(_OnnxPredictor):
+    """Drop-in for doctr's RecognitionPredictor: crops -> [(text, confidence)]."""
+
+    def __call__(self, crops):
+        if len(crops) == 0:
+            return []
+
+        from doctr.models.recognition.predictor._utils import remap_preds, split_crops
+
+        # Same wide-crop splitting as RecognitionPredictor.forward
+        split_param = getattr(self.predictor, "dil_factor", getattr(self.predictor, "overlap_ratio", None))
+        remapped = False
+        if self.predictor.split_wide_crops:
+            new_crops, crop_map, remapped = split_crops(
+                crops,
+                self.predictor.critical_ab_ratio,
+                self.predictor.target_ar,
+                split_param,
+                isinstance(crops[0], np.ndarray),
+            )
+            if remapped:
+                crops = new_crops
+
+        out = []
+        for batch in self.pre_processor(crops):
+            logits = torch.from_numpy(self._run(batch))
+            out.extend(self.postprocessor(logits))
+
+        if self.predictor.split_wide_crops and remapped:
+            out = remap_preds(out, crop_map, split_param)
+        return out
+
+
+def load_onnx_detector(name: str, build_predictor, device: torch.device):
+    """
+    `build_predictor(pretrained)` must return the doctr predictor and load no
+    weights when `pretrained` is False (pass `pretrained_backbone=False`).
+    Pretrained weights are only needed to export; a cached .onnx skips them.
+    """
+    pretrained = not os.path.exists(_onnx_path(name))
+    return OnnxDetectionPredictor(name, build_predictor(pretrained).eval(), device)
+
+
+def load_onnx_recognizer(name: str, build_predictor, device: torch.device):
+    """See load_onnx_detector."""
+    pretrained = not os.path.exists(_onnx_path(name))
+    return OnnxRecognitionPredictor(name, build_predictor(pretrained).eval(), device)
@@ -0,0 +1,162 @@
+
+import cProfile
+import os
+import random
+import re
+import uuid
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+
+from config import get_settings
+from logger import get_logger
+
+settings = get_settings()
+logger = get_logger("profiling")
+
+PROFILING_BACKENDS = ("torch", "cprofile", "both")
+
+# torch.profiler is process-global: only one stage can hold it at a time
+_torch_profiler_lock = Lock()
+
+
+class _NullSession:
+    """Returned when a request is not profiled; every hook is a no-op."""
+    trace_id = None
+
+    def stage(self, name: str):
+        return nullcontext()
+
+    def call(self, stage: str, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+
+NULL_SESSION = _NullSession()
+
+
+def _prune_profiles():
+    """Delete the oldest files in PROFILING_DIR beyond PROFILING_MAX_FILES."""
+    if settings.PROFILING_MAX_FILES <= 0:
+        return
+    files = []
+    try:
+        for entry in os.scandir(settings.PROFILING_DIR):
+            try:
+                if entry.is_file():
+                    files.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                # Pruned concurrently by another session or worker
+                continue
+    except FileNotFoundError:
+        return
+    files.sort()
+    for _, path in files[:max(0, len(files) - settings.PROFILING_MAX_FILES)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class ProfileSession:
+    """
+    Profiles individual pipeline stages of a single request and writes one
+    trace file per stage under PROFILING_DIR, prefixed with the trace id.
+    """
+
+    def __init__(self, trace_id: str, backend: str):
+        self.trace_id = trace_id
+        self.use_torch = backend in ("torch", "both")
+        self.use_cprofile = backend in ("cprofile", "both")
+        self.files = []
+        self._stage_counts = {}
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        _prune_profiles()
+
+    def _file_prefix(self, name: str) -> str:
+        # Stage names may contain user input (OCR model name)
+        name = re.sub(r"[^A-Za-z0-9_-]", "_", name)
+        # Stages may run more than once per request (e.g. SAM3 per batch image)
+        index = self._stage_counts.get(name, 0)
+        self._stage_counts[name] = index + 1
+        suffix = f"_{index}" if index else ""
+        return os.path.join(settings.PROFILING_DIR, f"{self.trace_id}_{name}{suffix}")
+
+    @contextmanager
+    def stage(self, name: str):
+        prefix = self._file_prefix(name)
+        torch_prof = None
+        py_prof = None
+        use_cprofile = self.use_cprofile
+
+        if self.use_torch and not _torch_profiler_lock.acquire(blocking=False):
+            # Another request's stage is being traced on a different thread
+            logger.warning(f"torch.profiler busy for stage {name}, falling back to cProfile")
+            use_cprofile = True
+        elif self.use_torch:
+            import torch
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            torch_prof = torch.profiler.profile(activities=activities, record_shapes=True)
+            try:
+                torch_prof.__enter__()
+            except Exception:
+                _torch_profiler_lock.release()
+                raise
+
+        if use_cprofile:
+            py_prof = cProfile.Profile()
+            try:
+                py_prof.enable()
+            except ValueError as e:
+                # Another profiler is already active on this thread
+                logger.warning(f"cProfile unavailable for stage {name}: {e}")
+                py_prof = None
+
+        try:
+            yield
+        finally:
+            if py_prof is not None:
+                py_prof.disable()
+                path = f"{prefix}.pstats"
+                py_prof.dump_stats(path)
+                self.files.append(path)
+            if torch_prof is not None:
+                try:
+                    torch_prof.__exit__(None, None, None)
+                    path = f"{prefix}.trace.json"
+                    torch_prof.export_chrome_trace(path)
+                    self.files.append(path)
+                finally:
+                    _torch_profiler_lock.release()
+
+    def call(self, stage: str, fn, *args, **kwargs):
+        with self.stage(stage):
+            return fn(*args, **kwargs)
+
+
+def start_session(request):
+    """
+    Decide whether this request is profiled. A request opts in with the
+    PROFILING_HEADER header or `?profile=1`; otherwise PROFILING_SAMPLE_RATE
+    of traffic is sampled. Always returns NULL_SESSION when profiling is off.
+    """
+    if not settings.PROFILING_ENABLED:
+        return NULL_SESSION
+
+    requested = (
+        request.headers.get(settings.PROFILING_HEADER, "").lower() in ("1", "true", "yes")
+        or request.query_params.get("profile", "").lower() in ("1", "true", "yes")
+    )
+    sampled = settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+    if not (requested or sampled):
+        return NULL_SESSION
+
+    if settings.PROFILING_BACKEND not in PROFILING_BACKENDS:
+        logger.warning(f"Unknown PROFILING_BACKEND '{settings.PROFILING_BACKEND}', using cprofile")
+        backend = "cprofile"
+    else:
+        backend = settings.PROFILING_BACKEND
+
+    trace_id = uuid.uuid4().hex
+    logger.info(f"Profiling {request.method} {request.url.path} as trace {trace_id} ({backend})")
+    return ProfileSession(trace_id, backend)
@@ -58,7 +58,7 @@ class SAM3Service:
             t0 = time.time()
             self._load_model_internal()
             duration = time.time() - t0
-            log_performance(logger, "SAM3 Model Load", duration)
+            log_performance(logger, "SAM3 Model Load", duration, stage="model_load", model="sam3")
 
     def _load_model_internal(self):
         if not os.path.exists(self.model_path):
@@ -136,7 +136,7 @@ class SAM3Service:
                     
                 results.append(class_result)
             
-            log_performance(logger, "SAM3 Inference", time.time() - t0, {"prompts": len(text_prompts)})
+            log_performance(logger, "SAM3 Inference", time.time() - t0, {"prompts": len(text_prompts)}, stage="sam3")
             return results
             
         except Exception as e:
@@ -0,0 +1,142 @@
+
+import gc
+import os
+import signal
+import socket
+import time
+
+import torch
+import uvicorn
+
+from config import get_settings
+from logger import get_logger
+
+settings = get_settings()
+logger = get_logger("serve")
+
+
+def preload_models():
+    """
+    Load models in the parent so forked workers share the weights.
+    Tensor data pages are shared copy-on-write: refcount updates in the
+    workers touch object headers, never the storage buffers.
+    Failures are logged and left to lazy loading in each worker.
+    """
+    from sam3_service import sam3_service
+    from dbnet_service import DBNetService
+    from ocr_service import OCRService
+
+    # Singletons: these are the instances the app already holds
+    dbnet_service = DBNetService()
+    ocr_service = OCRService()
+
+    loaders = {
+        "sam3": sam3_service.ensure_model_loaded,
+        "dbnet": dbnet_service.ensure_model_loaded,
+        "doctr": ocr_service._load_doctr,
+    }
+    for name, load in loaders.items():
+        try:
+            load()
+        except Exception as e:
+            logger.warning(f"Preload of {name} failed, workers will load it lazily: {e}")
+
+
+def _worker_main(app, sock: socket.socket, index: int):
+    threads = settings.WORKER_TORCH_THREADS or max(1, (os.cpu_count() or 1) // settings.SERVE_WORKERS)
+    torch.set_num_threads(threads)
+    if settings.ORT_INTRA_OP_THREADS == 0:
+        settings.ORT_INTRA_OP_THREADS = threads
+    logger.info(f"Worker {index} (pid {os.getpid()}) serving with {threads} torch threads")
+
+    config = uvicorn.Config(app, log_level=settings.LOG_LEVEL.lower())
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def _spawn(app, sock: socket.socket, index: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            _worker_main(app, sock, index)
+        except Exception as e:
+            logger.error(f"Worker {index} crashed: {e}", exc_info=True)
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def run_prefork(app):
+    """
+    Load models once, then fork SERVE_WORKERS uvicorn workers that share the
+    listening socket and the model weights (copy-on-write).
+    The parent only supervises: it restarts crashed workers and forwards
+    SIGTERM/SIGINT on shutdown.
+    """
+    workers = settings.SERVE_WORKERS
+    if settings.DEVICE == "cuda":
+        # The services probe CUDA at import, so the parent already holds a
+        # driver context that forked children cannot use
+        logger.error("SERVE_WORKERS > 1 is not supported with DEVICE=cuda, serving with a single worker")
+        uvicorn.run(app, host=settings.API_HOST, port=settings.API_PORT)
+        return
+    if settings.DEBUG:
+        logger.warning("Auto-reload is not available with SERVE_WORKERS > 1")
+
+    # Keep the parent's intra-op pool single-threaded; OpenMP pools
+    # started before fork are unusable in the children
+    torch.set_num_threads(1)
+    t0 = time.time()
+    preload_models()
+    logger.info(f"Models preloaded in {time.time() - t0:.2f}s")
+
+    # Objects allocated so far are never collected; freezing them keeps the
+    # children's GC from touching (and copying) the parent's pages
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((settings.API_HOST, settings.API_PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children = {_spawn(app, sock, i): i for i in range(workers)}
+    logger.info(f"Started {workers} workers: {sorted(children)}")
+
+    shutting_down = False
+
+    def _shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            from prometheus_client import multiprocess
+            multiprocess.mark_process_dead(pid)
+        if not shutting_down:
+            logger.warning(f"Worker {index} (pid {pid}) exited with status {status}, restarting")
+            time.sleep(1)
+            children[_spawn(app, sock, index)] = index
+
+    sock.close()
+    logger.info("All workers stopped")